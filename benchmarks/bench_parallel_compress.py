@@ -0,0 +1,74 @@
+import argparse
+import bz2
+import gzip
+import lzma
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parallel_compress import DEFAULT_BLOCK_SIZE, parallel_compress, parallel_decompress
+
+# Single-threaded stdlib baselines for each codec
+BASELINES = {
+    "bz2": (lambda data: bz2.compress(data, 9), bz2.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+    "gzip": (lambda data: gzip.compress(data, 9), gzip.decompress),
+}
+
+
+def sample_data(size):
+    # Log-like text: compressible, but not trivially so
+    lines = []
+    total = 0
+    i = 0
+    while total < size:
+        line = b"%d INFO request id=%s status=%d path=/api/v1/items/%d\n" % (
+            i, os.urandom(6).hex().encode(), 200 + (i % 7) * 50, i % 1000)
+        lines.append(line)
+        total += len(line)
+        i += 1
+    return b"".join(lines)[:size]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel multi-stream compression.")
+    parser.add_argument("--size", type=int, default=32 * 1024 * 1024, help="Input size in bytes")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="Block size in bytes")
+    parser.add_argument("--codecs", nargs="+", default=list(BASELINES), choices=list(BASELINES))
+    parser.add_argument("--workers", nargs="+", type=int,
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    data = sample_data(args.size)
+    size_mb = len(data) / (1024 * 1024)
+    print(f"Input: {size_mb:.1f} MB, block size {args.block_size} bytes, {os.cpu_count()} CPUs")
+    print(f"{'codec':<6} {'workers':>8} {'ratio':>7} {'comp MB/s':>10} {'speedup':>8} {'decomp MB/s':>12} {'speedup':>8}")
+
+    for codec in args.codecs:
+        compress, decompress = BASELINES[codec]
+        compressed, base_comp = timed(compress, data)
+        _, base_decomp = timed(decompress, compressed)
+        print(f"{codec:<6} {'stdlib':>8} {len(compressed) / len(data):>7.3f} "
+              f"{size_mb / base_comp:>10.1f} {1.0:>8.2f} {size_mb / base_decomp:>12.1f} {1.0:>8.2f}")
+
+        for workers in args.workers:
+            compressed, comp_time = timed(parallel_compress, data, codec,
+                                          block_size=args.block_size, workers=workers)
+            restored, decomp_time = timed(parallel_decompress, compressed, codec, workers=workers)
+            if restored != data or decompress(compressed) != data:
+                raise SystemExit(f"Round trip failed for {codec} with {workers} workers")
+            print(f"{codec:<6} {workers:>8} {len(compressed) / len(data):>7.3f} "
+                  f"{size_mb / comp_time:>10.1f} {base_comp / comp_time:>8.2f} "
+                  f"{size_mb / decomp_time:>12.1f} {base_decomp / decomp_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
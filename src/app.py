@@ -1,10 +1,12 @@
 import streamlit as st
 import os
 import pickle
-import bz2
+import hashlib
 import time
 from huffman import *
 from bzip2 import simplified_bzip2_compress, simplified_bzip2_decompress
+from dedup import ChunkStore
+from parallel_compress import DEFAULT_WORKERS, parallel_compress, parallel_decompress
 
 # Ensure the 'data' directory exists
 if not os.path.exists('data'):
@@ -189,10 +191,15 @@ with col1:
     st.write("Choose Compression Method")
     compression_method = st.selectbox(
         "",
-        ["Huffman Encoding", "Bzip2 Compression"],
+        ["Huffman Encoding", "Bzip2 Compression", "Deduplicated Storage"],
         label_visibility="collapsed"
     )
     
+    # Parallel Bzip2 settings
+    if compression_method == "Bzip2 Compression":
+        bzip2_workers = st.number_input("Worker Threads", min_value=1, max_value=64, value=min(DEFAULT_WORKERS, 64))
+        bzip2_block_kb = st.number_input("Block Size (KB)", min_value=100, max_value=16384, value=900, step=100)
+    
     st.markdown("---")
     
     # Supported file types
@@ -220,14 +227,14 @@ with col2:
     decompress_container = st.container()
     
     if uploaded_file is not None:
-        # Save the uploaded file
-        filepath = os.path.join("data", uploaded_file.name)
-        with open(filepath, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
         # Read the uploaded file
-        with open(filepath, "rb") as f:
-            data = f.read()
+        data = uploaded_file.getvalue()
+        
+        # Save the uploaded file (the dedup store keeps its own copy as chunks)
+        filepath = os.path.join("data", uploaded_file.name)
+        if compression_method != "Deduplicated Storage":
+            with open(filepath, "wb") as f:
+                f.write(data)
         
         # Check if the file is an image
         is_image = uploaded_file.type.startswith("image")
@@ -239,17 +246,16 @@ with col2:
         with preview_container:
             if not is_image:
                 try:
-                    with open(filepath, "r", encoding='utf-8', errors='replace') as f:
-                        preview_data = f.read(1000)
-                        if not preview_data.strip():
-                            st.warning("The file appears to be empty or contains only whitespace.")
-                        else:
-                            st.text_area("File Preview", preview_data, height=100)
+                    preview_data = data[:4000].decode('utf-8', errors='replace')[:1000]
+                    if not preview_data.strip():
+                        st.warning("The file appears to be empty or contains only whitespace.")
+                    else:
+                        st.text_area("File Preview", preview_data, height=100)
                 except Exception as e:
                     st.error(f"Could not read file as text: {str(e)}")
                     st.info("This might be a binary file.")
             else:
-                st.image(filepath, caption=uploaded_file.name, width=300)
+                st.image(data, caption=uploaded_file.name, width=300)
         
         # Compression action buttons
         with action_container:
@@ -380,10 +386,15 @@ with col2:
                     try:
                         status_placeholder.info("Compressing with Bzip2...")
                         
-                        # Compress data using Bzip2
+                        # Compress blocks in parallel into a multi-stream Bzip2 file
                         compressed_filepath = os.path.join("data", "compressed.bz2")
-                        with bz2.open(compressed_filepath, "wb") as f:
-                            f.write(data)
+                        compressed_bytes = parallel_compress(
+                            data,
+                            block_size=int(bzip2_block_kb) * 1024,
+                            workers=int(bzip2_workers),
+                        )
+                        with open(compressed_filepath, "wb") as f:
+                            f.write(compressed_bytes)
                         
                         # Calculate compression ratio
                         compressed_size = os.path.getsize(compressed_filepath)
@@ -430,8 +441,8 @@ with col2:
                             decomp_placeholder = st.empty()
                             decomp_placeholder.info("Decompressing file...")
                             
-                            with bz2.open(compressed_filepath, "rb") as f:
-                                decompressed_data = f.read()
+                            with open(compressed_filepath, "rb") as f:
+                                decompressed_data = parallel_decompress(f.read(), workers=int(bzip2_workers))
                             
                             decompressed_filepath = os.path.join("data", "decompressed" + os.path.splitext(uploaded_file.name)[1])
                             with open(decompressed_filepath, "wb") as f:
@@ -451,4 +462,83 @@ with col2:
                                     st.error(f"Could not display decompressed data as text: {str(e)}")
                     except Exception as e:
                         status_placeholder.error(f"Compression failed: {str(e)}")
-                        st.info("This might be due to an issue with the file format or content.")
\ No newline at end of file
+                        st.info("This might be due to an issue with the file format or content.")
+
+                elif compression_method == "Deduplicated Storage":
+                    try:
+                        status_placeholder.info("Chunking and deduplicating...")
+                        
+                        # Store only the chunks that are not already in the store.
+                        # Streamlit reruns this script on every interaction, so keep
+                        # the first result for this upload instead of storing it again.
+                        chunk_store = ChunkStore(os.path.join("data", "dedup"))
+                        dedup_key = f"dedup_{uploaded_file.name}_{hashlib.sha256(data).hexdigest()}"
+                        if dedup_key not in st.session_state:
+                            st.session_state[dedup_key] = chunk_store.put(uploaded_file.name, data)
+                        dedup_stats = st.session_state[dedup_key]
+                        store_stats = chunk_store.stats()
+                        if store_stats['storage_ratio'] > 1:
+                            store_saving = f"{store_stats['storage_ratio']:.2f}x smaller than the originals"
+                        else:
+                            store_saving = "no smaller than the originals yet"
+                        
+                        # Clear status
+                        status_placeholder.empty()
+                        
+                        # Display results in their container
+                        with results_container:
+                            st.markdown("### Deduplication Results:")
+                            metrics_cols = st.columns(4)
+                            with metrics_cols[0]:
+                                st.metric("Original Size", f"{file_size} bytes")
+                            with metrics_cols[1]:
+                                st.metric("Newly Stored", f"{dedup_stats['stored_bytes']} bytes")
+                            with metrics_cols[2]:
+                                st.metric("Deduplicated", f"{dedup_stats['dedup_ratio'] * 100:.2f}%")
+                            with metrics_cols[3]:
+                                st.metric("Chunking Speed", f"{dedup_stats['chunking_throughput'] / (1024 * 1024):.2f} MB/s")
+                            st.caption(
+                                f"{dedup_stats['new_chunks']} of {dedup_stats['total_chunks']} chunks were new. "
+                                f"Store holds {store_stats['files']} files in {store_stats['unique_chunks']} unique chunks "
+                                f"({store_saving})."
+                            )
+                        
+                        # Store decompress state in session state to avoid None returns
+                        if 'decompress_clicked' not in st.session_state:
+                            st.session_state.decompress_clicked = False
+                        
+                        # Restore option
+                        with decompress_container:
+                            st.markdown("---")
+                            if st.button("Restore File", key="decompress_dedup"):
+                                st.session_state.decompress_clicked = True
+                        
+                        # Process restore when button is clicked
+                        if st.session_state.decompress_clicked:
+                            decomp_placeholder = st.empty()
+                            decomp_placeholder.info("Restoring file from chunks...")
+                            
+                            # Rebuild the file in memory from its chunks; no copy is written to disk
+                            restored_data = b"".join(chunk_store.iter_restore(dedup_stats['manifest_id']))
+                            
+                            decomp_placeholder.success("File successfully restored!")
+                            
+                            # Display restored content
+                            if is_image:
+                                st.image(restored_data, caption="Restored Image", width=300)
+                            else:
+                                try:
+                                    restored_content = restored_data.decode('utf-8', errors='replace')
+                                    st.text_area("Restored Data", restored_content, height=150)
+                                except Exception as e:
+                                    st.error(f"Could not display restored data as text: {str(e)}")
+                            
+                            st.download_button(
+                                label="Download Restored File",
+                                data=restored_data,
+                                file_name=uploaded_file.name,
+                                mime=uploaded_file.type,
+                                key="download_dedup",
+                            )
+                    except Exception as e:
+                        status_placeholder.error(f"Deduplication failed: {str(e)}")
@@ -0,0 +1,294 @@
+import bisect
+import bz2
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+
+# Gear table: one pseudo-random 32-bit value per byte value. The seed is fixed
+# so chunk boundaries stay stable across runs and machines.
+_gear_rng = random.Random(0x6765617243444321)
+GEAR_TABLE = [_gear_rng.getrandbits(32) for _ in range(256)]
+del _gear_rng
+
+GEAR_BITS = 32
+MASK_32 = (1 << GEAR_BITS) - 1
+
+# bytes.translate tables giving byte k of the Gear value for every input byte
+_GEAR_BYTE_TABLES = [bytes((value >> (8 * k)) & 0xFF for value in GEAR_TABLE) for k in range(4)]
+
+# Bytes hashed per pass of _gear_hash_block
+HASH_BLOCK_SIZE = 64 * 1024
+
+# Chunk file suffixes: bz2-compressed, or stored as-is
+CHUNK_SUFFIXES = (".bz2", ".raw")
+
+MIN_CHUNK_SIZE = 2 * 1024
+AVG_CHUNK_SIZE = 8 * 1024
+MAX_CHUNK_SIZE = 64 * 1024
+
+
+def _gear_hash_block(block):
+    # Gear fingerprint after every byte of block, packed as one 8-byte
+    # little-endian lane per byte (the hash is in the low 4 bytes).
+    #
+    # The Gear hash h = (h << 1) + G[byte] only keeps the last 32 bytes in a
+    # 32-bit value, so h[i] = sum(G[block[i - k]] << k for k < 32) mod 2**32.
+    # Instead of looping over bytes, pack G[byte] into 8-byte lanes of one big
+    # integer and add shifted copies of it (1, 2, 4, 8, 16 lanes over): after
+    # five steps every lane holds its 32-byte window sum. The sum stays below
+    # 2**64, so lanes never carry into each other.
+    n = len(block)
+    lanes = bytearray(8 * n)
+    for k, table in enumerate(_GEAR_BYTE_TABLES):
+        lanes[k::8] = block.translate(table)
+    packed = int.from_bytes(lanes, "little")
+    width = 1
+    while width < GEAR_BITS:
+        packed += packed << (width * 64 + width)
+        width *= 2
+    return packed.to_bytes(8 * (n + GEAR_BITS), "little")[:8 * n]
+
+
+def _cut_candidates(data, mask):
+    # (offset, fingerprint) for every offset whose Gear fingerprint over the
+    # 32 bytes ending there has all mask bits clear, in order. The top byte of
+    # each lane is screened with a regex first, so only a small share of
+    # offsets is looked at in Python.
+    allowed = bytes(v for v in range(256) if not v & (mask >> 24))
+    screen = re.compile(b"[" + re.escape(allowed) + b"]")
+    context = GEAR_BITS - 1
+    candidates = []
+    for block_start in range(0, len(data), HASH_BLOCK_SIZE):
+        # Hash a few bytes before the block so its first windows are complete
+        lead = min(block_start, context)
+        block = bytes(data[block_start - lead:block_start + HASH_BLOCK_SIZE])
+        hashes = _gear_hash_block(block)
+        top_bytes = hashes[3::8]
+        for match in screen.finditer(top_bytes, lead):
+            lane = match.start()
+            fingerprint = int.from_bytes(hashes[lane * 8:lane * 8 + 4], "little")
+            if not fingerprint & mask:
+                candidates.append((block_start - lead + lane, fingerprint))
+    return candidates
+
+
+def _top_bits_mask(bits):
+    return (MASK_32 >> (GEAR_BITS - bits)) << (GEAR_BITS - bits)
+
+
+def chunk_boundaries(data, min_size=MIN_CHUNK_SIZE, avg_size=AVG_CHUNK_SIZE, max_size=MAX_CHUNK_SIZE):
+    # FastCDC-style content-defined chunking with a Gear rolling hash.
+    # Yields (offset, length) pairs that cover the whole input.
+    if not 0 < min_size <= avg_size <= max_size:
+        raise ValueError("Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size.")
+
+    bits = min(max(avg_size.bit_length() - 1, 2), GEAR_BITS - 1)
+    # Normalized chunking: a stricter mask before the average size and a
+    # looser one after it pulls chunk sizes towards the average
+    mask_small = _top_bits_mask(bits + 1)
+    mask_large = _top_bits_mask(bits - 1)
+
+    # Every offset that passes mask_small also passes mask_large, so one scan
+    # finds the cut points for both. A cut after offset i ends the chunk at i + 1.
+    candidates = _cut_candidates(data, mask_large)
+    cuts_large = [offset + 1 for offset, _ in candidates]
+    cuts_small = [offset + 1 for offset, fingerprint in candidates if not fingerprint & mask_small]
+
+    length = len(data)
+    start = 0
+    while start < length:
+        remaining = length - start
+        if remaining <= min_size:
+            yield start, remaining
+            return
+
+        end = start + min(remaining, max_size)
+        normal = start + min(remaining, avg_size)
+        cut = end
+
+        j = bisect.bisect_right(cuts_small, start + min_size)
+        if j < len(cuts_small) and cuts_small[j] <= normal:
+            cut = cuts_small[j]
+        else:
+            j = bisect.bisect_right(cuts_large, normal)
+            if j < len(cuts_large) and cuts_large[j] <= end:
+                cut = cuts_large[j]
+
+        yield start, cut - start
+        start = cut
+
+
+# Streamlit serves every session on its own thread, so updates to the store
+# index (and the chunk-exists check that feeds it) are serialised here
+_index_lock = threading.Lock()
+
+
+def _write_atomic(path, data):
+    # Write to a unique temporary file next to path and move it into place,
+    # so readers and crashes never see a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ChunkStore:
+    # Content-addressed store: every unique chunk is written once under
+    # chunks/, bz2-compressed (.bz2) or as-is (.raw) when compressing would
+    # not make it smaller, and each uploaded version of a file is kept as a
+    # JSON manifest of chunk digests under manifests/. Running totals live in
+    # index.json so reporting never has to scan the whole store.
+    def __init__(self, root=os.path.join("data", "dedup"), min_size=MIN_CHUNK_SIZE,
+                 avg_size=AVG_CHUNK_SIZE, max_size=MAX_CHUNK_SIZE, compresslevel=9):
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.manifest_dir = os.path.join(root, "manifests")
+        self.index_path = os.path.join(root, "index.json")
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        self.compresslevel = compresslevel
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def _chunk_path(self, digest, suffix=".bz2"):
+        return os.path.join(self.chunk_dir, digest[:2], digest + suffix)
+
+    def _manifest_path(self, manifest_id):
+        # Only keep the base name so uploads cannot escape the store
+        return os.path.join(self.manifest_dir, os.path.basename(manifest_id) + ".json")
+
+    def _find_chunk(self, digest):
+        for suffix in CHUNK_SUFFIXES:
+            path = self._chunk_path(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def has_chunk(self, digest):
+        return self._find_chunk(digest) is not None
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {"files": 0, "logical_bytes": 0, "unique_chunks": 0, "stored_bytes": 0}
+        with open(self.index_path, "r") as f:
+            return json.load(f)
+
+    def put(self, name, data):
+        # Split data into chunks, store the ones we have not seen yet and
+        # write a manifest for this version of the file. Each version gets
+        # its own manifest, keyed by name and the SHA-256 of the whole file,
+        # so older uploads stay restorable. Returns statistics for this upload.
+        data = memoryview(data)
+        chunks = []
+        pending = []
+        seen = set()
+
+        start_time = time.perf_counter()
+        boundaries = list(chunk_boundaries(data, self.min_size, self.avg_size, self.max_size))
+        chunking_time = time.perf_counter() - start_time
+
+        for offset, length in boundaries:
+            chunk = data[offset:offset + length]
+            digest = hashlib.sha256(chunk).hexdigest()
+            chunks.append({"digest": digest, "size": length})
+            if digest in seen or self.has_chunk(digest):
+                continue
+            seen.add(digest)
+            compressed = bz2.compress(chunk, self.compresslevel)
+            if len(compressed) < length:
+                pending.append((digest, length, ".bz2", compressed))
+            else:
+                # Already-compressed content (images) would only grow
+                pending.append((digest, length, ".raw", chunk.tobytes()))
+
+        file_digest = hashlib.sha256(data).hexdigest()
+        manifest_id = f"{os.path.basename(name)}.{file_digest[:16]}"
+        manifest = {"name": name, "sha256": file_digest, "size": len(data), "chunks": chunks}
+
+        new_chunks = 0
+        new_bytes = 0
+        stored_bytes = 0
+        with _index_lock:
+            for digest, length, suffix, payload in pending:
+                # Another upload may have stored the chunk since we checked
+                if self.has_chunk(digest):
+                    continue
+                path = self._chunk_path(digest, suffix)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _write_atomic(path, payload)
+                new_chunks += 1
+                new_bytes += length
+                stored_bytes += len(payload)
+
+            index = self._read_index()
+            manifest_path = self._manifest_path(manifest_id)
+            if not os.path.exists(manifest_path):
+                _write_atomic(manifest_path, json.dumps(manifest).encode("utf-8"))
+                index["files"] += 1
+                index["logical_bytes"] += len(data)
+            index["unique_chunks"] += new_chunks
+            index["stored_bytes"] += stored_bytes
+            _write_atomic(self.index_path, json.dumps(index).encode("utf-8"))
+
+        total_bytes = len(data)
+        return {
+            "manifest_id": manifest_id,
+            "total_chunks": len(chunks),
+            "new_chunks": new_chunks,
+            "total_bytes": total_bytes,
+            "new_bytes": new_bytes,
+            "stored_bytes": stored_bytes,
+            # Share of the upload that was already in the store
+            "dedup_ratio": (1 - new_bytes / total_bytes) if total_bytes else 0.0,
+            "chunking_seconds": chunking_time,
+            "chunking_throughput": total_bytes / chunking_time if chunking_time > 0 else 0.0,
+        }
+
+    def load_manifest(self, manifest_id):
+        path = self._manifest_path(manifest_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No manifest stored for '{manifest_id}'.")
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def iter_restore(self, manifest_id):
+        # Stream the original file back one chunk at a time, checking every
+        # chunk against the digest it is stored under
+        manifest = self.load_manifest(manifest_id)
+        for entry in manifest["chunks"]:
+            path = self._find_chunk(entry["digest"])
+            if path is None:
+                raise FileNotFoundError(f"Chunk {entry['digest']} is missing from the store.")
+            with open(path, "rb") as f:
+                chunk = f.read()
+            if path.endswith(".bz2"):
+                chunk = bz2.decompress(chunk)
+            if hashlib.sha256(chunk).hexdigest() != entry["digest"]:
+                raise ValueError(f"Chunk {entry['digest']} is corrupt: digest mismatch.")
+            yield chunk
+
+    def restore(self, manifest_id, out_path):
+        with open(out_path, "wb") as f:
+            for chunk in self.iter_restore(manifest_id):
+                f.write(chunk)
+        return out_path
+
+    def stats(self):
+        # Store-wide figures from the running totals: logical bytes across all
+        # stored versions versus the bytes kept on disk for unique chunks
+        with _index_lock:
+            index = self._read_index()
+        # Logical bytes per byte on disk, combining dedup and compression
+        index["storage_ratio"] = (index["logical_bytes"] / index["stored_bytes"]) if index["stored_bytes"] else 0.0
+        return index
@@ -0,0 +1,142 @@
+import bz2
+import lzma
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# pbzip2-style parallel compression: the input is cut into fixed-size blocks,
+# each block is compressed as an independent stream on a thread pool (the
+# stdlib codecs release the GIL while they work) and the streams are simply
+# concatenated. bz2, xz and gzip readers all accept multi-stream files, so the
+# output stays readable by bz2.open / lzma.open / gzip.open.
+
+DEFAULT_BLOCK_SIZE = 900 * 1024
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Byte patterns that start a stream for each codec. For bz2 we also require
+# the first block magic (or the end-of-stream magic for empty streams) so
+# random matches inside compressed data are rare.
+STREAM_MAGIC = {
+    "bz2": re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)"),
+    "lzma": re.compile(re.escape(b"\xfd7zXZ\x00")),
+    "gzip": re.compile(re.escape(b"\x1f\x8b\x08")),
+}
+
+
+def _compress_block(block, codec, level):
+    if codec == "bz2":
+        return bz2.compress(block, level)
+    if codec == "lzma":
+        return lzma.compress(block, format=lzma.FORMAT_XZ, preset=level)
+    # Plain zlib streams cannot be concatenated, so use gzip framing
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+def _new_decompressor(codec):
+    if codec == "bz2":
+        return bz2.BZ2Decompressor()
+    if codec == "lzma":
+        return lzma.LZMADecompressor(format=lzma.FORMAT_XZ)
+    return zlib.decompressobj(31)
+
+
+def _decompress_stream(data, codec):
+    # Decompress one stream from the start of data. Returns the output, the
+    # number of bytes consumed, and whether the stream ended cleanly.
+    decompressor = _new_decompressor(codec)
+    try:
+        output = decompressor.decompress(data)
+    except (OSError, EOFError, lzma.LZMAError, zlib.error):
+        return b"", 0, False
+    return output, len(data) - len(decompressor.unused_data), decompressor.eof
+
+
+def _check_codec(codec):
+    if codec not in STREAM_MAGIC:
+        raise ValueError(f"Unsupported codec '{codec}'. Choose from: {', '.join(STREAM_MAGIC)}.")
+
+
+def _default_level(codec):
+    return 6 if codec == "lzma" else 9
+
+
+def parallel_compress(data, codec="bz2", level=None, block_size=DEFAULT_BLOCK_SIZE, workers=DEFAULT_WORKERS):
+    _check_codec(codec)
+    if block_size <= 0:
+        raise ValueError("Block size must be positive.")
+    if workers <= 0:
+        raise ValueError("Worker count must be positive.")
+    if level is None:
+        level = _default_level(codec)
+
+    data = memoryview(data)
+    if not data:
+        return _compress_block(b"", codec, level)
+
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)]
+    if workers == 1 or len(blocks) == 1:
+        return b"".join(_compress_block(block, codec, level) for block in blocks)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map keeps the block order, which is what makes the output valid
+        return b"".join(executor.map(lambda block: _compress_block(block, codec, level), blocks))
+
+
+def parallel_decompress(data, codec="bz2", workers=DEFAULT_WORKERS):
+    # Decompress a multi-stream file by decompressing every stream on the
+    # thread pool. Stream starts are found by scanning for the codec magic;
+    # a match that turns out not to be a real boundary is handled by falling
+    # back to a sequential decode from the last known-good position.
+    _check_codec(codec)
+    if workers <= 0:
+        raise ValueError("Worker count must be positive.")
+
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    starts = [m.start() for m in STREAM_MAGIC[codec].finditer(data)]
+    if not starts or starts[0] != 0:
+        raise ValueError(f"Input does not start with a {codec} stream.")
+
+    data = memoryview(data)
+    ends = starts[1:] + [len(data)]
+    segments = [data[start:end] for start, end in zip(starts, ends)]
+    if workers == 1 or len(segments) == 1:
+        results = [_decompress_stream(segment, codec) for segment in segments]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda segment: _decompress_stream(segment, codec), segments))
+
+    index_of = {start: i for i, start in enumerate(starts)}
+    output = []
+    i = 0
+    while i < len(starts):
+        chunk, consumed, finished = results[i]
+        if finished and consumed == len(segments[i]):
+            output.append(chunk)
+            i += 1
+            continue
+
+        # The next match was a false boundary inside this stream: keep feeding
+        # the following segments to one decompressor until the stream ends.
+        # Going segment by segment means only the tail of the last one is
+        # copied into unused_data, not the rest of the file.
+        decompressor = _new_decompressor(codec)
+        j = i
+        try:
+            while not decompressor.eof and j < len(segments):
+                output.append(decompressor.decompress(segments[j]))
+                j += 1
+        except (OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+            raise ValueError(f"Corrupt {codec} stream at offset {starts[i]}: {e}") from e
+        if not decompressor.eof:
+            raise ValueError(f"Corrupt or truncated {codec} stream at offset {starts[i]}.")
+        next_start = ends[j - 1] - len(decompressor.unused_data)
+        if next_start == len(data):
+            break
+        if next_start not in index_of:
+            raise ValueError(f"Unexpected data after {codec} stream at offset {next_start}.")
+        i = index_of[next_start]
+
+    return b"".join(output)
@@ -0,0 +1,162 @@
+import bz2
+import os
+import random
+
+import pytest
+
+from dedup import (
+    GEAR_TABLE,
+    MASK_32,
+    ChunkStore,
+    _top_bits_mask,
+    chunk_boundaries,
+)
+
+
+def random_bytes(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def reference_boundaries(data, min_size, avg_size, max_size):
+    # Byte-at-a-time Gear chunker with the same cut rules as chunk_boundaries
+    bits = min(max(avg_size.bit_length() - 1, 2), 31)
+    mask_small = _top_bits_mask(bits + 1)
+    mask_large = _top_bits_mask(bits - 1)
+    fingerprints = []
+    fingerprint = 0
+    for byte in data:
+        fingerprint = ((fingerprint << 1) + GEAR_TABLE[byte]) & MASK_32
+        fingerprints.append(fingerprint)
+
+    boundaries = []
+    start = 0
+    while start < len(data):
+        remaining = len(data) - start
+        if remaining <= min_size:
+            boundaries.append((start, remaining))
+            break
+        end = start + min(remaining, max_size)
+        normal = start + min(remaining, avg_size)
+        cut = end
+        for i in range(start + min_size, end):
+            mask = mask_small if i < normal else mask_large
+            if not fingerprints[i] & mask:
+                cut = i + 1
+                break
+        boundaries.append((start, cut - start))
+        start = cut
+    return boundaries
+
+
+@pytest.mark.parametrize("sizes", [(2048, 8192, 65536), (64, 256, 1024), (1, 4, 8)])
+@pytest.mark.parametrize("length", [0, 1, 100, 70000, 200001])
+def test_chunk_boundaries_match_reference(sizes, length):
+    data = random_bytes(length, seed=length)
+    assert list(chunk_boundaries(data, *sizes)) == reference_boundaries(data, *sizes)
+
+
+def test_chunk_boundaries_cover_input_within_limits():
+    data = random_bytes(500000)
+    boundaries = list(chunk_boundaries(data))
+    offset = 0
+    for start, length in boundaries:
+        assert start == offset
+        offset += length
+    assert offset == len(data)
+    # Only the final chunk may be shorter than the minimum
+    assert all(2048 < length <= 65536 for _, length in boundaries[:-1])
+
+
+def test_chunk_boundaries_cut_repetitive_data_at_max_size():
+    boundaries = list(chunk_boundaries(b"\x00" * 200000, 2048, 8192, 65536))
+    assert [length for _, length in boundaries[:-1]] == [65536, 65536, 65536]
+
+
+def test_chunk_boundaries_resync_after_insert():
+    data = random_bytes(400000)
+    edited = data[:100000] + b"inserted" + data[100000:]
+    original = {data[start:start + length] for start, length in chunk_boundaries(data)}
+    changed = [edited[start:start + length] for start, length in chunk_boundaries(edited)]
+    # Only the chunks around the edit should differ
+    assert sum(chunk not in original for chunk in changed) <= 2
+
+
+def test_chunk_boundaries_reject_bad_sizes():
+    with pytest.raises(ValueError):
+        list(chunk_boundaries(b"data", 100, 50, 200))
+
+
+def test_put_and_restore_round_trip(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    data = b"".join(b"%d request took %d ms\n" % (i, i * 7919 % 1000) for i in range(20000))
+    stats = store.put("log.txt", data)
+    assert b"".join(store.iter_restore(stats["manifest_id"])) == data
+    assert stats["new_bytes"] == len(data)
+    assert stats["dedup_ratio"] == 0.0
+
+
+def test_second_version_reuses_chunks(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    first = random_bytes(300000)
+    second = first[:150000] + b"new line\n" + first[150000:]
+    first_stats = store.put("log.txt", first)
+    second_stats = store.put("log.txt", second)
+
+    assert first_stats["manifest_id"] != second_stats["manifest_id"]
+    assert second_stats["dedup_ratio"] > 0.9
+    # Both versions stay restorable
+    assert b"".join(store.iter_restore(first_stats["manifest_id"])) == first
+    assert b"".join(store.iter_restore(second_stats["manifest_id"])) == second
+
+
+def test_same_upload_is_counted_once(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    data = random_bytes(100000)
+    first = store.put("image.png", data)
+    again = store.put("image.png", data)
+    assert again["manifest_id"] == first["manifest_id"]
+    assert again["new_chunks"] == 0
+    assert store.stats()["files"] == 1
+
+
+def test_stats_match_chunks_on_disk(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    base = random_bytes(200000)
+    store.put("a.txt", base)
+    store.put("a.txt", base + b"tail")
+    store.put("b.txt", b"text " * 50000)
+
+    chunk_files = [
+        os.path.join(dirpath, name)
+        for dirpath, _, names in os.walk(store.chunk_dir)
+        for name in names
+    ]
+    stats = store.stats()
+    assert stats["files"] == 3
+    assert stats["unique_chunks"] == len(chunk_files)
+    assert stats["stored_bytes"] == sum(os.path.getsize(path) for path in chunk_files)
+
+
+def test_incompressible_chunks_are_stored_raw(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    data = random_bytes(200000)
+    stats = store.put("image.jpg", data)
+    assert stats["stored_bytes"] == len(data)
+    assert store.stats()["storage_ratio"] == 1.0
+    assert b"".join(store.iter_restore(stats["manifest_id"])) == data
+
+
+def test_corrupt_chunk_fails_digest_check(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    stats = store.put("log.txt", b"some text\n" * 10000)
+    digest = store.load_manifest(stats["manifest_id"])["chunks"][0]["digest"]
+    with open(store._find_chunk(digest), "wb") as f:
+        f.write(bz2.compress(b"something else"))
+    with pytest.raises(ValueError, match="digest mismatch"):
+        list(store.iter_restore(stats["manifest_id"]))
+
+
+def test_missing_manifest(tmp_path):
+    store = ChunkStore(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        store.load_manifest("missing.txt.0000")
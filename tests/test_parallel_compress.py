@@ -0,0 +1,77 @@
+import bz2
+import gzip
+import lzma
+import random
+
+import pytest
+
+from parallel_compress import STREAM_MAGIC, parallel_compress, parallel_decompress
+
+READERS = {"bz2": bz2.decompress, "lzma": lzma.decompress, "gzip": gzip.decompress}
+
+FALSE_MAGIC = {
+    "gzip": b"\x1f\x8b\x08",
+    "lzma": b"\xfd7zXZ\x00",
+}
+
+
+def random_bytes(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def assert_round_trip(data, codec, **kwargs):
+    compressed = parallel_compress(data, codec, **kwargs)
+    assert READERS[codec](compressed) == data
+    for workers in (1, 4):
+        assert parallel_decompress(compressed, codec, workers=workers) == data
+    return compressed
+
+
+@pytest.mark.parametrize("codec", list(READERS))
+def test_empty_input(codec):
+    assert_round_trip(b"", codec)
+
+
+@pytest.mark.parametrize("codec", list(READERS))
+def test_multi_stream_round_trip(codec):
+    data = random_bytes(300000)
+    compressed = assert_round_trip(data, codec, block_size=64 * 1024)
+    assert len(STREAM_MAGIC[codec].findall(compressed)) >= 5
+
+
+@pytest.mark.parametrize("codec", list(FALSE_MAGIC))
+def test_false_stream_boundaries(codec):
+    # At level 0 gzip and xz store random input almost verbatim, so magic
+    # bytes in the input show up in the output inside a stream. One magic per
+    # stretch of random bytes keeps every block incompressible.
+    block_size = 16 * 1024
+    data = b"".join(random_bytes(4000, seed=i) + FALSE_MAGIC[codec] for i in range(20))
+    compressed = assert_round_trip(data, codec, level=0, block_size=block_size)
+    # More magic matches than streams means the fallback path was taken
+    streams = -(-len(data) // block_size)
+    assert len(STREAM_MAGIC[codec].findall(compressed)) > streams
+
+
+def test_false_boundary_in_last_stream():
+    data = random_bytes(3000) + FALSE_MAGIC["gzip"] + random_bytes(3000, seed=1)
+    assert_round_trip(data, "gzip", level=0)
+
+
+def test_truncated_input():
+    compressed = parallel_compress(random_bytes(200000), "bz2", block_size=64 * 1024)
+    with pytest.raises(ValueError):
+        parallel_decompress(compressed[:-10])
+
+
+def test_not_a_stream():
+    with pytest.raises(ValueError):
+        parallel_decompress(b"not compressed data")
+
+
+def test_bad_arguments():
+    with pytest.raises(ValueError):
+        parallel_compress(b"data", "zip")
+    with pytest.raises(ValueError):
+        parallel_compress(b"data", block_size=0)
+    with pytest.raises(ValueError):
+        parallel_decompress(b"data", workers=0)